@@ -1,19 +1,60 @@
-from flask import Flask, render_template, redirect, url_for, request, session, g
+from flask import Flask, render_template, redirect, url_for, request, session, g, abort
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
 from datetime import datetime
-from werkzeug.utils import secure_filename
+from collections import namedtuple
 import os
+import secrets
+import shutil
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tweetr.db'
+# Keep connections pooled so the connect-time pragmas run once per connection,
+# and wait up to 30s on a locked database instead of failing
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'connect_args': {'check_same_thread': False, 'timeout': 30},
+}
 app.config['SECRET_KEY'] = 'ilovecode' 
+# In-process cache; use RedisCache when running several workers
+app.config['CACHE_TYPE'] = 'SimpleCache'
+app.config['CACHE_DEFAULT_TIMEOUT'] = 300
 
 
 # Set the upload folder and allowed extensions
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
+app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+# Number of tweets shown per page on the timeline and profile pages
+PAGE_SIZE = 50
+# Password hashing method, pinned rather than relying on Werkzeug's default
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+def hash_password(password):
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD, salt_length=16)
+
+# Checked against on failed username lookups so login takes the same time
+# whether or not the account exists
+DUMMY_HASH = hash_password('!dummy!')
 db = SQLAlchemy(app)
+cache = Cache(app)
+
+# WAL lets readers run alongside a writer, and synchronous=NORMAL is safe with
+# WAL while skipping an fsync per commit
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+with app.app_context():
+    event.listen(db.engine, 'connect', set_sqlite_pragmas)
 
 #database models
 class User(db.Model):
@@ -28,32 +69,93 @@ class User(db.Model):
 class Tweet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(280), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_tweet_ts_id', timestamp.desc(), id.desc()),
+        db.Index('ix_tweet_user_ts', user_id, timestamp.desc(), id.desc()),
+    )
+
+
+# create_all() only adds missing tables, so indexes declared after a database
+# was created are added here; checkfirst makes this a no-op once they exist
+with app.app_context():
+    db.create_all()
+    for index in Tweet.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+# What g.user exposes for the logged-in user, cached briefly between requests
+CurrentUser = namedtuple('CurrentUser', ['id', 'username', 'gender', 'profile_picture'])
+USER_CACHE_TIMEOUT = 60
 
 @app.before_request
 def load_user():
-    if 'user_id' in session:
-        g.user = User.query.get(session['user_id'])
-    else:
+    # Static files never need the current user
+    if request.endpoint == 'static' or 'user_id' not in session:
         g.user = None
+        return
+
+    user_id = session['user_id']
+    key = f'user:{user_id}'
+    g.user = cache.get(key)
+    if g.user is None:
+        user = db.session.get(User, user_id)
+        if user:
+            g.user = CurrentUser(user.id, user.username, user.gender, user.profile_picture)
+            cache.set(key, g.user, timeout=USER_CACHE_TIMEOUT)
+
+def paginate(query):
+    # Keyset pagination on (timestamp, id), newest first. The cursor of the
+    # last row shown is passed back as ?before_ts=&before_id= for the next page.
+    before_ts = request.args.get('before_ts')
+    before_id = request.args.get('before_id', type=int)
+    if before_ts and before_id is not None:
+        try:
+            before_ts = datetime.fromisoformat(before_ts)
+        except ValueError:
+            abort(400)
+        query = query.filter(db.or_(
+            Tweet.timestamp < before_ts,
+            db.and_(Tweet.timestamp == before_ts, Tweet.id < before_id),
+        ))
+    tweets = query.order_by(Tweet.timestamp.desc(), Tweet.id.desc()).limit(PAGE_SIZE + 1).all()
+
+    next_cursor = None
+    if len(tweets) > PAGE_SIZE:
+        tweets = tweets[:PAGE_SIZE]
+        last = tweets[-1]
+        next_cursor = {'before_ts': last.timestamp.isoformat(), 'before_id': last.id}
+    return tweets, next_cursor
 
 @app.route('/')
 def index():
     if not g.user:
         return render_template('landing.html')
-    tweets = Tweet.query.order_by(Tweet.timestamp.desc()).all()
-    return render_template('timeline.html', tweets=tweets)
+
+    # The tweet list is the same for every user, so the rendered fragment is
+    # cached under the newest tweet id. Posting a tweet changes the key.
+    latest_id = db.session.query(db.func.max(Tweet.id)).scalar()
+    key = f"timeline:{latest_id}:{request.args.get('before_ts')}:{request.args.get('before_id')}"
+    fragment = cache.get(key)
+    if fragment is None:
+        tweets, next_cursor = paginate(Tweet.query.options(joinedload(Tweet.author)))
+        fragment = render_template('tweet_list.html', tweets=tweets, next_cursor=next_cursor)
+        cache.set(key, fragment)
+    return render_template('timeline.html', fragment=fragment)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        user = User.query.filter_by(username=username).first()
+        # Only the id and hash are needed, no need to load the full User
+        user = db.session.execute(
+            db.select(User.id, User.password).filter_by(username=username)
+        ).first()
 
-        if user and check_password_hash(user.password, password):
+        password_ok = check_password_hash(user.password if user else DUMMY_HASH, password)
+        if user and password_ok:
             session['user_id'] = user.id
             return redirect(url_for('index'))
 
@@ -69,16 +171,20 @@ def register():
         password = request.form['password']
         gender = request.form['gender']
 
-        hashed_pw = generate_password_hash(password)
+        hashed_pw = hash_password(password)
 
         # Handle profile picture upload
         file = request.files['profile_picture']
         profile_picture = None
 
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
+            # Random name so uploads with the same filename don't overwrite each
+            # other; the extension was already checked against ALLOWED_EXTENSIONS
+            ext = file.filename.rsplit('.', 1)[1].lower()
+            filename = f'{secrets.token_hex(8)}.{ext}'
             profile_picture = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(profile_picture)
+            with open(profile_picture, 'wb', buffering=1 << 16) as out:
+                shutil.copyfileobj(file.stream, out, length=1 << 16)
 
         new_user = User(username=username, password=hashed_pw, gender=gender, profile_picture=profile_picture)
         db.session.add(new_user)
@@ -105,12 +211,26 @@ def tweet():
 
     return redirect(url_for('index'))
 
+def bulk_tweet(items):
+    # Insert many tweets (dicts of column values) in one statement and one
+    # commit, for seeding and imports. A missing or None timestamp gets the
+    # column default, since pagination needs every tweet to have one and
+    # databases created before the column was NOT NULL don't enforce it.
+    now = datetime.utcnow()
+    items = [{**item, 'timestamp': item.get('timestamp') or now} for item in items]
+    db.session.execute(db.insert(Tweet), items)
+    db.session.commit()
+
 @app.route('/profile/<int:user_id>')
 def profile(user_id):
-    user = User.query.get_or_404(user_id)
-    tweets = Tweet.query.filter_by(user_id=user_id).order_by(Tweet.timestamp.desc()).all()
+    # Your own profile is rendered from the already loaded g.user
+    if g.user and g.user.id == user_id:
+        user = g.user
+    else:
+        user = db.get_or_404(User, user_id)
+    tweets, next_cursor = paginate(Tweet.query.filter_by(user_id=user_id))
 
-    return render_template('profile.html', user=user, tweets=tweets)
+    return render_template('profile.html', user=user, tweets=tweets, next_cursor=next_cursor)
 
 
 if __name__ == '__main__':
@@ -31,8 +31,10 @@ from __future__ import annotations
 import json
 from typing import TYPE_CHECKING, Any
 
+from .up import header_to_opt, param_to_opt
+
 if TYPE_CHECKING:  # pragma: no cover
-    from collections.abc import Mapping
+    from collections.abc import Iterator, Mapping
 
 
 class BaseAdapter:
@@ -55,6 +57,22 @@ class BaseAdapter:
         Needs to be implemented."""
         raise NotImplementedError  # pragma: no cover
 
+    def request_up_headers(self) -> Iterator[tuple[str, str]]:
+        """Yields `(option, value)` pairs for the `X-Up-*` request headers.
+
+        Can be overriden if the framework offers a faster way to find them."""
+        for k, v in self.request_headers().items():
+            if k.startswith("X-Up-"):
+                yield header_to_opt(k), v
+
+    def request_up_params(self) -> Iterator[tuple[str, str]]:
+        """Yields `(option, value)` pairs for the `_up_*` GET params.
+
+        Can be overriden if the framework offers a faster way to find them."""
+        for k, v in self.request_params().items():
+            if k.startswith("_up_"):
+                yield param_to_opt(k), v
+
     def redirect_uri(self, response: Any) -> str | None:
         """Returns the redirect target of a response or None if the response
         is not a redirection (ie if it's status code is not in the range 300-400).
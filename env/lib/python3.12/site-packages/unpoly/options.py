@@ -14,6 +14,22 @@ class _Sentinel(Enum):
     SENTINEL = 0
 
 
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _copy_context(value: object) -> object:
+    """Deep copy JSON-shaped data without the overhead of :func:`copy.deepcopy`.
+
+    Falls back to :func:`copy.deepcopy` for anything that did not come from JSON."""
+    if type(value) is dict:
+        return {k: _copy_context(v) for k, v in value.items()}
+    if type(value) is list:
+        return [_copy_context(v) for v in value]
+    if type(value) in _JSON_SCALARS:
+        return value
+    return copy.deepcopy(value)
+
+
 @attrs.define(kw_only=True)
 class Options:
     # mostly request options
@@ -38,22 +54,17 @@ class Options:
     events: list[dict[str, object]] = attrs.field(factory=list)
 
     def __attrs_post_init__(self) -> None:
-        self.initial_context = copy.deepcopy(self.context)
+        self.initial_context = cast(dict[str, object], _copy_context(self.context))
 
     @property
     def context_diff(self) -> dict[str, object]:
         old = self.initial_context
         new = self.context
-        old_keys = set(old)
-        new_keys = set(new)
-        result: dict[str, object] = {}
-        for key in old_keys - new_keys:
-            result[key] = None
-        for key in new_keys - old_keys:
-            result[key] = new[key]
-        for key in new_keys & old_keys:
-            if old[key] != new[key]:
-                result[key] = new[key]
+        result: dict[str, object] = {key: None for key in old if key not in new}
+        for key, value in new.items():
+            old_value = old.get(key, _Sentinel.SENTINEL)
+            if old_value is _Sentinel.SENTINEL or old_value != value:
+                result[key] = value
         return result
 
     @classmethod
@@ -81,11 +92,12 @@ class Options:
         opts = cls(**parsed_options)  # type: ignore [reportGeneralTypeIssues,arg-type]
         # Apply the passed context diff
         if context_diff:
+            context = opts.context
             for k, v in context_diff.items():
-                if v is None and k in opts.context:
-                    del opts.context[k]
+                if v is None and k in context:
+                    del context[k]
                 else:
-                    opts.context[k] = v
+                    context[k] = v
         return opts
 
     def serialize(self, adapter: BaseAdapter) -> dict[str, str]:
@@ -97,7 +109,7 @@ class Options:
         for key in ("accept_layer", "dismiss_layer"):
             value = getattr(self, key)
             if value != _Sentinel.SENTINEL:
-                serialized_options[key] = adapter.serialize_data(getattr(self, key))
+                serialized_options[key] = adapter.serialize_data(value)
 
         if self.expire_cache:
             serialized_options["expire_cache"] = self.expire_cache
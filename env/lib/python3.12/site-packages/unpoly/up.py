@@ -26,9 +26,10 @@ An example usage could look like this (`request.up` is enabled via the :ref:`Dja
 """
 from __future__ import annotations
 
-from functools import cached_property
+import re
+from functools import cached_property, lru_cache
 from typing import TYPE_CHECKING
-from urllib.parse import parse_qs, urlencode
+from urllib.parse import urlencode
 
 from .options import Options
 
@@ -36,10 +37,16 @@ if TYPE_CHECKING:  # pragma: no cover
     from unpoly.adapter import BaseAdapter
 
 
+# Matches a single `_up_*` param (with or without a value) in a query string
+_UP_PARAM_RE = re.compile(r"(?:^|&)_up_[^&=]*(?:=[^&]*)?")
+
+
+@lru_cache(maxsize=64)
 def header_to_opt(header: str) -> str:
     return header[5:].lower().replace("-", "_")
 
 
+@lru_cache(maxsize=64)
 def opt_to_header(opt: str) -> str:
     parts = (x.capitalize() for x in opt.split("_"))
     return f"X-Up-{'-'.join(parts)}"
@@ -114,23 +121,25 @@ class Unpoly:
         self.adapter = adapter
 
     @cached_property
-    def options(self) -> Options:
-        headers = dict(self.adapter.request_headers())
-        params = self.adapter.request_params()
+    def _request_options(self) -> dict[str, str]:
+        """The raw `X-Up-*` headers and `_up_*` params, keyed by option name.
+
+        Empty for most requests, in which case there is nothing to parse."""
+        options = dict(self.adapter.request_up_headers())
+        options.update(self.adapter.request_up_params())
+        return options
 
-        options = {
-            header_to_opt(k): v for k, v in headers.items() if k.startswith("X-Up-")
-        }
-        options.update(
-            {param_to_opt(k): v for k, v in params.items() if k.startswith("_up_")}
-        )
-        return Options.parse(options, self.adapter)
+    @cached_property
+    def options(self) -> Options:
+        if not self._request_options:
+            return Options()
+        return Options.parse(dict(self._request_options), self.adapter)
 
     def __bool__(self) -> bool:
         """Returns true if the request is triggered via Unpoly.
 
         This basically checks if the `X-Up-Version` header is set."""
-        return bool(self.options.version)
+        return bool(self._request_options) and bool(self.options.version)
 
     def set_title(self, value: str) -> None:
         """Sets the title so Unpoly can update the <title> tag (`X-Up-Title`)."""
@@ -214,6 +223,11 @@ class Unpoly:
         It should be noted that the response is passed as is to current adapter, which
         knows how to set headers on the response etc.
         """
+        if not self._request_options:
+            # Plain request: only the `_up_method` cookie needs to be set or cleared
+            self.adapter.set_cookie(response, self.adapter.method != "GET")
+            return
+
         self.adapter.set_cookie(response, self.needs_cookie)
 
         if not self:
@@ -225,20 +239,19 @@ class Unpoly:
         if redirect_uri:
             if "context" in serialized_options:
                 serialized_options["context_diff"] = serialized_options.pop("context")
-            params = {opt_to_param(k): v for k, v in serialized_options.items()}
-            sep = "&" if "?" in redirect_uri else "?"
-            if params:
-                redirect_uri += sep + urlencode(params)
+            if serialized_options:
+                sep = "&" if "?" in redirect_uri else "?"
+                redirect_uri += sep + urlencode(
+                    [(opt_to_param(k), v) for k, v in serialized_options.items()]
+                )
             self.adapter.set_redirect_uri(response, redirect_uri)
         else:
             loc = self.adapter.location
             if "?" in loc and "_up_" in loc:  # Not 100% exact, but will do
                 loc, qs = loc.split("?", 1)
-                items = {
-                    k: v for k, v in parse_qs(qs).items() if not k.startswith("_up_")
-                }
-                if items:
-                    loc = f"{loc}?{urlencode(items, doseq=True)}"
+                qs = _UP_PARAM_RE.sub("", qs).lstrip("&")
+                if qs:
+                    loc = f"{loc}?{qs}"
                 serialized_options["location"] = loc
             serialized_options["method"] = self.adapter.method
             headers = {opt_to_header(k): v for k, v in serialized_options.items()}